@@ -14,5 +14,11 @@ MLFLOW_USER = os.getenv("MLFLOW_USER")
 MLFLOW_PASSWORD = os.getenv("MLFLOW_PASSWORD")
 MLFLOW_URL = os.getenv("MLFLOW_URL")
 MLFLOW_PORT = os.getenv("MLFLOW_PORT")
+NPROC_PER_NODE = int(os.getenv("NPROC_PER_NODE") or 1)
+NUM_NODES = int(os.getenv("NUM_NODES") or 1)
+NODE_RANK = int(os.getenv("NODE_RANK") or 0)
+THREADS_PER_PROC = int(os.getenv("THREADS_PER_PROC") or 0) or None
+# Upper bound (in bytes) for `gds.graph.project.estimate`, projection is refused above it. Unset means no limit.
+MAX_PROJECTION_MEMORY_BYTES = int(os.getenv("MAX_PROJECTION_MEMORY_BYTES") or 0) or None
 
 DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
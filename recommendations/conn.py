@@ -1,19 +1,32 @@
+import hashlib
+import json
+import time
+
 import pandas as pd
 import torch
 
+from loguru import logger
 from neo4j import GraphDatabase
-from recommendations import GDB_URL, GBD_PORT, GDB_USER, GDB_PASSWORD
+from recommendations import GDB_URL, GBD_PORT, GDB_USER, GDB_PASSWORD, MAX_PROJECTION_MEMORY_BYTES
+
+from recommendations.consts import QUERIES, PROJECTIONS, EMBEDDING
 
 from recommendations.encoders import SequenceEncoder, LabelsEncoder, IdentityEncoder
 
 
+class ProjectionMemoryLimitExceeded(RuntimeError):
+    """
+    Estimated GDS projection memory is above MAX_PROJECTION_MEMORY_BYTES.
+    """
+
+
 class GraphDBDriver:
     """
     Driver for running queries in neo4j database.
     """
 
-    def __init__(self) -> None:
-        self.driver = GraphDatabase.driver(f"{GDB_URL}:{GBD_PORT}", auth=(GDB_USER, GDB_PASSWORD))
+    def __init__(self, driver=None) -> None:
+        self.driver = driver or GraphDatabase.driver(f"{GDB_URL}:{GBD_PORT}", auth=(GDB_USER, GDB_PASSWORD))
 
     def fetch_data(self, query: str, params: dict = {}) -> pd.DataFrame:
         with self.driver.session() as session:
@@ -49,3 +62,73 @@ class GraphDBDriver:
             edge_attr = torch.cat(edge_attrs, dim=-1)
 
         return edge_index, edge_attr
+
+    def projection_fingerprint(self, graph_name: str) -> str:
+        """
+        Fingerprint of a GDS projection, based on node and relationship counts of the projected labels
+        and types together with the projection and FastRP definitions.
+        """
+        projection = PROJECTIONS[graph_name]
+        stats = self.fetch_data(QUERIES["count_projected_entities"]).iloc[0]
+        payload = {
+            "projection": QUERIES["create_database"][graph_name],
+            "embeddings": QUERIES["create_node_embeddings_in_database"][graph_name],
+            "labels": {label: stats["labels"].get(label, 0) for label in projection["node_labels"]},
+            "relationship_types": {
+                rel_type: stats["relTypesCount"].get(rel_type, 0) for rel_type in projection["relationship_types"]
+            },
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def ensure_projection(self, graph_name: str) -> str:
+        """
+        Keep GDS projection and FastRP embeddings in sync with the database.
+        The projection is (re)built and embeddings rewritten only when the fingerprint stored
+        in the `GdsProjection` marker node differs from the current one.
+        Returns taken decision: 'reuse', 'skip', 'build' or 'rebuild'.
+        """
+        start = time.perf_counter()
+        fingerprint = self.projection_fingerprint(graph_name)
+        stored_fingerprint = self.fetch_data(
+            QUERIES["get_projection_marker"], params={"graph_name": graph_name}
+        )["fingerprint"].iloc[0]
+        exists = bool(self.fetch_data(QUERIES["graph_exists"][graph_name])["exists"].iloc[0])
+        logger.info(f"Fingerprint of '{graph_name}' checked in {time.perf_counter() - start:.2f}s")
+
+        if fingerprint == stored_fingerprint:
+            decision = "reuse" if exists else "skip"
+            logger.info(f"Data behind '{graph_name}' unchanged, {decision} projection and '{EMBEDDING}' embeddings")
+            return decision
+
+        start = time.perf_counter()
+        estimate = self.fetch_data(QUERIES["estimate_database"][graph_name]).iloc[0]
+        logger.info(
+            f"Projection of '{graph_name}' estimated to {estimate['requiredMemory']} "
+            f"({estimate['nodeCount']} nodes, {estimate['relationshipCount']} relationships) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        if MAX_PROJECTION_MEMORY_BYTES is not None and estimate["bytesMax"] > MAX_PROJECTION_MEMORY_BYTES:
+            raise ProjectionMemoryLimitExceeded(
+                f"Projection of '{graph_name}' needs up to {estimate['bytesMax']} bytes, "
+                f"limit is {MAX_PROJECTION_MEMORY_BYTES} bytes"
+            )
+
+        decision = "rebuild" if exists else "build"
+        if exists:
+            start = time.perf_counter()
+            self.fetch_data(QUERIES["delete_database"][graph_name])
+            logger.info(f"Stale projection '{graph_name}' dropped in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        self.fetch_data(QUERIES["create_database"][graph_name])
+        logger.info(f"Projection '{graph_name}' created in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        self.fetch_data(QUERIES["create_node_embeddings_in_database"][graph_name])
+        logger.info(f"'{EMBEDDING}' embeddings written in {time.perf_counter() - start:.2f}s")
+
+        self.fetch_data(
+            QUERIES["set_projection_marker"], params={"graph_name": graph_name, "fingerprint": fingerprint}
+        )
+        logger.info(f"Projection '{graph_name}' {decision} finished")
+        return decision
@@ -1,4 +1,6 @@
-from recommendations import MLFLOW_URL_PREFIX, MLFLOW_URL, MLFLOW_PORT, MLFLOW_USER, MLFLOW_PASSWORD
+from recommendations import (
+    MLFLOW_URL_PREFIX, MLFLOW_URL, MLFLOW_PORT, MLFLOW_USER, MLFLOW_PASSWORD, NPROC_PER_NODE, NUM_NODES
+)
 
 ENCODER_MODEL_NAME = "all-MiniLM-L6-v2"
 TRAIN_FRAC = 0.8
@@ -13,6 +15,13 @@ MAX_PRED_VALUE = 10
 PRED_BENCHMARK = 9
 MAX_PRED_USERS = 100
 MAX_PRED_RECOMMENDATIONS = 10
+SEED = 42
+
+DIST_BACKEND = "gloo"
+WORLD_SIZE = NPROC_PER_NODE * NUM_NODES
+DIST_TIMEOUT_MINUTES = 120  # node 0 fetches and encodes data while other nodes wait at rendezvous
+EVAL_EVERY = 10  # distributed training evaluates on rank 0 only every EVAL_EVERY epochs
+BENCHMARK_EPOCHS = 10  # single-process baseline epochs for scaling efficiency, 0 disables it
 
 MLFLOW_TRACKING_PATH = f"{MLFLOW_URL_PREFIX}://{MLFLOW_USER}:{MLFLOW_PASSWORD}@{MLFLOW_URL}:{MLFLOW_PORT}"
 MLFLOW_EXPERIMENT_NAME = "book-recommendations-in-graph"
@@ -20,6 +29,22 @@ MLFLOW_EXPERIMENT_NAME = "book-recommendations-in-graph"
 SELECTED_GRAPH = "book_titles"
 EMBEDDING_DIMENSION = 56
 EMBEDDING = "fastrp"
+PROJECTIONS = {
+    "book_titles": {
+        "node_labels": ['Titles', 'Users', 'Authors', 'Publishers', 'YearsOfPublication'],
+        "relationship_types": ['RATED_BY', 'READ_BY', 'PUBLISHED_BY', 'WRITTEN_BY', 'WRITTEN_IN_YEAR'],
+        "relationshipProjection": """
+              {
+                RATED_BY: {orientation:'NATURAL'},
+                READ_BY: {orientation:'NATURAL'},
+                PUBLISHED_BY: {orientation:'NATURAL'},
+                WRITTEN_BY: {orientation:'NATURAL'},
+                WRITTEN_IN_YEAR: {orientation:'UNDIRECTED'}
+              }
+        """
+    }
+}
+PROJECTIONS["book_titles"]["nodeProjection"] = str(PROJECTIONS["book_titles"]["node_labels"])
 QUERIES = {
     "list_named_graphs": """
         CALL gds.graph.list()
@@ -29,19 +54,34 @@ QUERIES = {
             CALL gds.graph.drop('book_titles')
         """
     },
-    "create_database": {
+    "graph_exists": {
         "book_titles": """
-            CALL gds.graph.project('book_titles', ['Titles', 'Users', 'Authors', 'Publishers', 'YearsOfPublication'],
-              {
-                RATED_BY: {orientation:'NATURAL'},
-                READ_BY: {orientation:'NATURAL'},
-                PUBLISHED_BY: {orientation:'NATURAL'},
-                WRITTEN_BY: {orientation:'NATURAL'},
-                WRITTEN_IN_YEAR: {orientation:'UNDIRECTED'}
-              }
-            )
+            CALL gds.graph.exists('book_titles') YIELD exists
         """
     },
+    "estimate_database": {
+        "book_titles": """
+            CALL gds.graph.project.estimate({nodeProjection}, {relationshipProjection})
+            YIELD requiredMemory, bytesMin, bytesMax, nodeCount, relationshipCount
+        """.format(**PROJECTIONS["book_titles"])
+    },
+    "create_database": {
+        "book_titles": """
+            CALL gds.graph.project('book_titles', {nodeProjection}, {relationshipProjection})
+        """.format(**PROJECTIONS["book_titles"])
+    },
+    "count_projected_entities": """
+        CALL apoc.meta.stats() YIELD labels, relTypesCount
+        RETURN labels, relTypesCount
+    """,
+    "get_projection_marker": """
+        OPTIONAL MATCH (m:GdsProjection {graphName: $graph_name})
+        RETURN m.fingerprint AS fingerprint
+    """,
+    "set_projection_marker": """
+        MERGE (m:GdsProjection {graphName: $graph_name})
+        SET m.fingerprint = $fingerprint, m.updatedAt = datetime()
+    """,
     "create_node_embeddings_in_database": {
         "book_titles": """
             CALL gds.fastRP.write(
@@ -0,0 +1,152 @@
+import copy
+import io
+import os
+import time
+from datetime import timedelta
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from loguru import logger
+from mlflow import MlflowClient
+from torch.nn.parallel import DistributedDataParallel
+
+from recommendations import NPROC_PER_NODE, NODE_RANK, THREADS_PER_PROC
+from recommendations.consts import (
+    DIST_BACKEND, DIST_TIMEOUT_MINUTES, WORLD_SIZE, EPOCHS, EVAL_EVERY, LEARNING_RATE, SEED, MLFLOW_TRACKING_PATH
+)
+
+
+def _pin_threads(local_rank: int) -> list[int]:
+    """
+    Pin worker process to its own slice of node cores and size torch thread pools to that slice.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count()))
+    threads = THREADS_PER_PROC or max(1, len(cores) // NPROC_PER_NODE)
+    start = local_rank * threads
+    rank_cores = sorted({cores[i % len(cores)] for i in range(start, start + threads)})
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, rank_cores)
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    return rank_cores
+
+
+def _shard_supervision_edges(train_data, rank: int):
+    """
+    Keep only every WORLD_SIZE-th supervision edge (starting at rank), message passing edges stay untouched.
+    """
+    shard = copy.copy(train_data)
+    store = shard['user', 'rates', 'title']
+    store.edge_label_index = store.edge_label_index[:, rank::WORLD_SIZE]
+    store.edge_label = store.edge_label[rank::WORLD_SIZE]
+    return shard
+
+
+def _worker(local_rank: int, trainer_cls, payload, run_id, result_queue) -> None:
+    """
+    Single rank of data-parallel training, results are sent back to the launcher by global rank 0.
+    """
+    rank = NODE_RANK * NPROC_PER_NODE + local_rank
+    cores = _pin_threads(local_rank)
+    dist.init_process_group(
+        DIST_BACKEND, init_method="env://", rank=rank, world_size=WORLD_SIZE,
+        timeout=timedelta(minutes=DIST_TIMEOUT_MINUTES),
+    )
+    logger.info(f"Rank {rank}/{WORLD_SIZE} pinned to cores {cores}")
+
+    # Every rank trains on data prepared by global rank 0, so splits and mappings cannot differ between nodes
+    objects = [payload[:2] if rank == 0 else None]
+    dist.broadcast_object_list(objects, src=0)
+    train_data, weight = objects[0]
+    if rank == 0:
+        val_data, test_data = payload[2:]
+
+    shard = _shard_supervision_edges(train_data, rank)
+    torch.manual_seed(SEED)
+    model = trainer_cls._init_model(train_data)
+    ddp_model = DistributedDataParallel(model)
+    optimizer = torch.optim.Adam(ddp_model.parameters(), lr=LEARNING_RATE)
+
+    # Run stays owned by the launcher, rank 0 only adds metrics to it
+    client = MlflowClient(tracking_uri=MLFLOW_TRACKING_PATH) if rank == 0 and run_id is not None else None
+
+    # Train step is timed between barriers, so waiting for the slowest rank is included
+    train_time = 0.0
+    dist.barrier()
+    loop_start = time.perf_counter()
+    for epoch in range(1, EPOCHS):
+        dist.barrier()
+        start = time.perf_counter()
+        loss = trainer_cls._train(model=ddp_model, optimizer=optimizer, train_data=shard, weight=weight)
+        loss = torch.tensor(loss)
+        dist.all_reduce(loss)
+        train_time += time.perf_counter() - start
+        loss = float(loss) / WORLD_SIZE
+
+        # Evaluation is a serial section on rank 0, so it runs only every EVAL_EVERY epochs
+        if rank == 0 and (epoch % EVAL_EVERY == 0 or epoch == EPOCHS - 1):
+            train_rmse = trainer_cls._test(data=train_data, model=model)
+            val_rmse = trainer_cls._test(data=val_data, model=model)
+            test_rmse = trainer_cls._test(data=test_data, model=model)
+            logger.info(f'Epoch: {epoch:03d}, Loss: {loss:.4f}, Train: {train_rmse:.4f}, Val: {val_rmse:.4f}, Test: {test_rmse:.4f}')
+            if client is not None:
+                client.log_metric(run_id, "train_rmse", train_rmse, step=epoch)
+                client.log_metric(run_id, "val_rmse", val_rmse, step=epoch)
+                client.log_metric(run_id, "test_rmse", test_rmse, step=epoch)
+        if client is not None:
+            client.log_metric(run_id, "loss", loss, step=epoch)
+    dist.barrier()
+    wall_time = time.perf_counter() - loop_start
+
+    if rank == 0:
+        buffer = io.BytesIO()
+        torch.save(model.state_dict(), buffer)
+        result_queue.put((buffer.getvalue(), train_time / (EPOCHS - 1), wall_time / (EPOCHS - 1)))
+
+    dist.destroy_process_group()
+
+
+def train_distributed(trainer_cls, payload: tuple = None, run_id: str = None):
+    """
+    Launch NPROC_PER_NODE gloo workers on this node, rendezvous goes through MASTER_ADDR / MASTER_PORT env vars.
+    `payload` (train_data, weight, val_data, test_data) is given on node 0 only and handed to global rank 0 alone,
+    the rest of ranks receive train data through broadcast.
+    Returns trained model state dict, mean train step time and mean epoch wall time (with evaluation) on node 0,
+    None on other nodes.
+    """
+    os.environ.setdefault("MASTER_ADDR", "localhost")
+    os.environ.setdefault("MASTER_PORT", "29500")
+    context = mp.get_context("spawn")
+    result_queue = context.SimpleQueue()
+    processes = []
+    for local_rank in range(NPROC_PER_NODE):
+        process = context.Process(
+            target=_worker,
+            args=(local_rank, trainer_cls, payload if local_rank == 0 else None, run_id, result_queue),
+        )
+        process.start()
+        processes.append(process)
+
+    # Drain the queue while waiting, large state dict would otherwise block rank 0 on exit
+    result = None
+    while any(process.is_alive() for process in processes):
+        if any(process.exitcode not in (None, 0) for process in processes):
+            for process in processes:
+                process.terminate()
+            raise RuntimeError(f"Distributed training failed, exit codes: {[p.exitcode for p in processes]}")
+        if result is None and not result_queue.empty():
+            result = result_queue.get()
+        processes[0].join(timeout=1)
+    if any(process.exitcode != 0 for process in processes):
+        raise RuntimeError(f"Distributed training failed, exit codes: {[p.exitcode for p in processes]}")
+    if result is None and not result_queue.empty():
+        result = result_queue.get()
+    if result is None:
+        return None
+
+    state_dict, epoch_time, epoch_wall_time = result
+    return torch.load(io.BytesIO(state_dict)), epoch_time, epoch_wall_time
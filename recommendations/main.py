@@ -1,6 +1,7 @@
 import torch
 from loguru import logger
 
+from recommendations import NODE_RANK
 from recommendations.conn import GraphDBDriver
 from recommendations.consts import QUERIES, SELECTED_GRAPH
 from recommendations.encoders import SequenceEncoder, LabelsEncoder, IdentityEncoder
@@ -8,17 +9,16 @@ from recommendations.train import RecommendationsOnGraph
 
 
 def main():
+    if NODE_RANK != 0:
+        logger.info("Join distributed training, data is received from node 0")
+        RecommendationsOnGraph(data_dict=None).generate_predictions()
+        return
+
     logger.info("Get Driver to GraphDB")
     gdb_driver = GraphDBDriver()
 
-    logger.info("Make a new entry to GDS graph list")
-    try:
-        gdb_driver.fetch_data(query=QUERIES["create_database"][SELECTED_GRAPH])
-        gdb_driver.fetch_data(query=QUERIES["create_node_embeddings_in_database"][SELECTED_GRAPH])
-    except:
-        logger.info("Entry already exists")
-        ng_df = gdb_driver.fetch_data(query=QUERIES["list_named_graphs"])["graphName"]
-        logger.info(ng_df.tolist())
+    logger.info("Sync GDS graph projection")
+    gdb_driver.ensure_projection(graph_name=SELECTED_GRAPH)
 
     logger.info("Fetch Node Data")
     user_x, user_mapping = gdb_driver.load_node(
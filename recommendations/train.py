@@ -1,3 +1,5 @@
+import time
+
 import torch
 
 from loguru import logger
@@ -14,12 +16,13 @@ from mlflow import MlflowClient
 from torch_geometric.data import HeteroData
 from torch_geometric.transforms import ToUndirected, RandomLinkSplit
 
-from recommendations import DEVICE
+from recommendations import DEVICE, NODE_RANK, NUM_NODES
 from recommendations.consts import (
     ENCODER_MODEL_NAME, TRAIN_FRAC, VALID_FRAC, TEST_FRAC, NEG_SAMPLING_RATIO, HIDDEN_CHANNELS, LEARNING_RATE, EPOCHS,
     MIN_PRED_VALUE, MAX_PRED_VALUE, PRED_BENCHMARK, MAX_PRED_USERS, MAX_PRED_RECOMMENDATIONS,
-    MLFLOW_TRACKING_PATH, MLFLOW_EXPERIMENT_NAME
+    MLFLOW_TRACKING_PATH, MLFLOW_EXPERIMENT_NAME, SEED, WORLD_SIZE, EVAL_EVERY, BENCHMARK_EPOCHS
 )
+from recommendations.distributed import train_distributed
 from recommendations.models import Model
 
 
@@ -55,7 +58,8 @@ class RecommendationsOnGraph:
         return data
 
 
-    def _weighted_mse_loss(self, pred, target, weight=None):
+    @staticmethod
+    def _weighted_mse_loss(pred, target, weight=None):
         """
         MSE Loss definition
         """
@@ -77,7 +81,8 @@ class RecommendationsOnGraph:
         return transform(data)
 
 
-    def _train(self, model, optimizer, train_data, weight):
+    @classmethod
+    def _train(cls, model, optimizer, train_data, weight):
         """
         Training Model Function
         """
@@ -86,13 +91,14 @@ class RecommendationsOnGraph:
         pred = model(train_data.x_dict, train_data.edge_index_dict,
                      train_data['user', 'rates', 'title'].edge_label_index)
         target = train_data['user', 'rates', 'title'].edge_label
-        loss = self._weighted_mse_loss(pred, target, weight)
+        loss = cls._weighted_mse_loss(pred, target, weight)
         loss.backward()
         optimizer.step()
         return float(loss)
 
+    @staticmethod
     @torch.no_grad()
-    def _test(self, data, model):
+    def _test(data, model):
         model.eval()
         pred = model(data.x_dict, data.edge_index_dict,
                      data['user', 'rates', 'title'].edge_label_index)
@@ -114,38 +120,134 @@ class RecommendationsOnGraph:
         print("tags: {}".format(tags))
 
 
-    def _run_model(self):
+    @staticmethod
+    def _log_params():
         """
-        Train Selected Graph Model, set mlflow connection and
+        Log training hyperparameters to active MLFlow run.
+        """
+        mlflow.log_param("epochs", EPOCHS)
+        mlflow.log_param("model_architecture", "GNNEncoder -> to_hetero -> EdgeDecoder")
+        mlflow.log_param("encoder_model_name", ENCODER_MODEL_NAME)
+        mlflow.log_param("train_fraction", TRAIN_FRAC)
+        mlflow.log_param("valid_fraction", VALID_FRAC)
+        mlflow.log_param("test_fraction", TEST_FRAC)
+        mlflow.log_param("neg_sampling_ratio", NEG_SAMPLING_RATIO)
+        mlflow.log_param("hidden_channels", HIDDEN_CHANNELS)
+        mlflow.log_param("learning_rate", LEARNING_RATE)
+
+
+    def _prepare_data(self):
+        """
+        Build graph, split it (with fixed seed) and compute loss weights.
         """
         data = self._build_heterogeneous_graph(self.data_dict)
+        torch.manual_seed(SEED)
         (train_data, val_data, test_data) = self._train_valid_test_split(data=data)
         weight = torch.bincount(train_data['user', 'title'].edge_label)
         weight = weight.max() / weight
+        return data, train_data, val_data, test_data, weight
+
+
+    @staticmethod
+    def _init_model(train_data):
+        """
+        Create model and initialize its lazy modules.
+        """
+        model = Model(hidden_channels=HIDDEN_CHANNELS, metadata=train_data.metadata()).to(DEVICE)
+        with torch.no_grad():
+            model.encoder(train_data.x_dict, train_data.edge_index_dict)
+        return model
+
+
+    def _benchmark_epoch_time(self, train_data, weight):
+        """
+        Mean train epoch time of single-process training, baseline for distributed scaling efficiency.
+        """
+        torch.manual_seed(SEED)
+        model = self._init_model(train_data)
+        optimizer = torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_EPOCHS):
+            self._train(model=model, optimizer=optimizer, train_data=train_data, weight=weight)
+        return (time.perf_counter() - start) / BENCHMARK_EPOCHS
+
+
+    def _run_model_distributed(self):
+        """
+        Train Selected Graph Model with data-parallel workers (torch.distributed, gloo) and report scaling efficiency.
+        Only node 0 prepares the data, workers on other nodes get it broadcast from global rank 0.
+        """
+        if NODE_RANK != 0:
+            train_distributed(type(self))
+            return None, None
+
+        data, train_data, val_data, test_data, weight = self._prepare_data()
+        num_supervision_edges = train_data['user', 'rates', 'title'].edge_label_index.size(1)
+        if num_supervision_edges < WORLD_SIZE:
+            raise ValueError(
+                f"Cannot shard {num_supervision_edges} supervision edges across {WORLD_SIZE} ranks, "
+                f"every rank needs at least one edge"
+            )
+
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_PATH)
+        mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
+        # Run stays open during training, so a failure marks it as failed
+        with mlflow.start_run() as run:
+            self._log_params()
+            mlflow.log_param("world_size", WORLD_SIZE)
+            mlflow.log_param("eval_every", EVAL_EVERY)
+
+            state_dict, epoch_time, epoch_wall_time = train_distributed(
+                type(self), payload=(train_data, weight, val_data, test_data), run_id=run.info.run_id
+            )
+            model = self._init_model(train_data)
+            model.load_state_dict(state_dict)
+
+            logger.info(f'Epoch time on {WORLD_SIZE} ranks: train step {epoch_time:.4f}s, wall {epoch_wall_time:.4f}s')
+            mlflow.log_metric("distributed_epoch_time", epoch_time)
+            mlflow.log_metric("distributed_epoch_wall_time", epoch_wall_time)
+            # Baseline runs after distributed training, so workers on other nodes are not kept waiting at rendezvous
+            if BENCHMARK_EPOCHS:
+                baseline_epoch_time = self._benchmark_epoch_time(train_data=train_data, weight=weight)
+                speedup = baseline_epoch_time / epoch_time
+                efficiency = speedup / WORLD_SIZE
+                logger.info(
+                    f'Train step time: single-process {baseline_epoch_time:.4f}s, {WORLD_SIZE} ranks {epoch_time:.4f}s, '
+                    f'speedup: {speedup:.2f}x, scaling efficiency: {efficiency:.2%}'
+                )
+                mlflow.log_metric("baseline_epoch_time", baseline_epoch_time)
+                mlflow.log_metric("speedup", speedup)
+                mlflow.log_metric("scaling_efficiency", efficiency)
+            mlflow.pytorch.log_model(model, "book_recommendations_gnn_encoder_model",
+                                     registered_model_name="BookRecommendationsGNNEncoderModel")
+
+        return data, model
+
+
+    def _run_model(self):
+        """
+        Train Selected Graph Model, set mlflow connection and
+        """
+        if NODE_RANK >= NUM_NODES:
+            raise ValueError(f"NODE_RANK={NODE_RANK} must be lower than NUM_NODES={NUM_NODES}")
+        if WORLD_SIZE > 1:
+            return self._run_model_distributed()
+
+        data, train_data, val_data, test_data, weight = self._prepare_data()
 
         # MLFlow logging
         mlflow.set_tracking_uri(MLFLOW_TRACKING_PATH)
         mlflow.set_experiment(MLFLOW_EXPERIMENT_NAME)
 
         # Initialize the model
-        model = Model(hidden_channels=HIDDEN_CHANNELS, metadata=data.metadata()).to(DEVICE)
-        with torch.no_grad():
-            model.encoder(train_data.x_dict, train_data.edge_index_dict)
+        model = self._init_model(train_data)
 
         optimizer = torch.optim.Adam(model.parameters(), lr=LEARNING_RATE)
 
         # ----------------- VERSION BASIC -----------------
         # Train the model
         with mlflow.start_run() as run:
-            mlflow.log_param("epochs", EPOCHS)
-            mlflow.log_param("model_architecture", "GNNEncoder -> to_hetero -> EdgeDecoder")
-            mlflow.log_param("encoder_model_name", ENCODER_MODEL_NAME)
-            mlflow.log_param("train_fraction", TRAIN_FRAC)
-            mlflow.log_param("valid_fraction", VALID_FRAC)
-            mlflow.log_param("test_fraction", TEST_FRAC)
-            mlflow.log_param("neg_sampling_ratio", NEG_SAMPLING_RATIO)
-            mlflow.log_param("hidden_channels", HIDDEN_CHANNELS)
-            mlflow.log_param("learning_rate", LEARNING_RATE)
+            self._log_params()
             for epoch in range(1, EPOCHS):
                 # with mlflow.start_run(nested=True):
                 loss = self._train(model=model, optimizer=optimizer, train_data=train_data, weight=weight)
@@ -185,9 +287,12 @@ class RecommendationsOnGraph:
         """
         Generates recommendations based on predictions from the model.
         """
+        data, model = self._run_model()
+        if model is None:
+            return None
+
         title_mapping = self.data_dict["mapping"]["title"]
         user_mapping = self.data_dict["mapping"]["title"]
-        data, model = self._run_model()
 
         num_title = len(title_mapping)
         num_users = len(user_mapping)
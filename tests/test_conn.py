@@ -0,0 +1,144 @@
+import pytest
+
+from recommendations import conn
+from recommendations.conn import GraphDBDriver, ProjectionMemoryLimitExceeded
+from recommendations.consts import QUERIES, SELECTED_GRAPH
+
+
+class StubRecord:
+    def __init__(self, row: dict) -> None:
+        self.row = row
+
+    def values(self):
+        return list(self.row.values())
+
+
+class StubResult:
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+
+    def __iter__(self):
+        return (StubRecord(row) for row in self.rows)
+
+    def keys(self):
+        return list(self.rows[0].keys()) if self.rows else []
+
+
+class StubSession:
+    def __init__(self, driver) -> None:
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def run(self, query: str, params: dict):
+        self.driver.queries.append(query)
+        if query in self.driver.failing:
+            raise RuntimeError(f"Query failed: {query}")
+        return StubResult(self.driver.responses.get(query, []))
+
+
+class StubDriver:
+    """
+    Neo4j driver returning canned rows per query and recording executed queries.
+    """
+    def __init__(self, stored_fingerprint: str = None, exists: bool = False, failing: tuple = ()) -> None:
+        self.queries = []
+        self.failing = failing
+        self.responses = {
+            QUERIES["count_projected_entities"]: [{
+                "labels": {"Titles": 10, "Users": 5, "Authors": 3, "Publishers": 2, "YearsOfPublication": 4},
+                "relTypesCount": {"RATED_BY": 20, "READ_BY": 30, "PUBLISHED_BY": 10, "WRITTEN_BY": 10,
+                                  "WRITTEN_IN_YEAR": 10},
+            }],
+            QUERIES["get_projection_marker"]: [{"fingerprint": stored_fingerprint}],
+            QUERIES["graph_exists"][SELECTED_GRAPH]: [{"exists": exists}],
+            QUERIES["estimate_database"][SELECTED_GRAPH]: [{
+                "requiredMemory": "1 KiB", "bytesMin": 1024, "bytesMax": 1024, "nodeCount": 24,
+                "relationshipCount": 90,
+            }],
+        }
+
+    def session(self):
+        return StubSession(self)
+
+
+def current_fingerprint() -> str:
+    return GraphDBDriver(driver=StubDriver()).projection_fingerprint(SELECTED_GRAPH)
+
+
+def test_rebuild_when_label_count_changes():
+    stub = StubDriver(stored_fingerprint=current_fingerprint(), exists=True)
+    stub.responses[QUERIES["count_projected_entities"]][0]["labels"]["Titles"] += 1
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "rebuild"
+
+
+def test_rebuild_when_relationship_count_changes():
+    stub = StubDriver(stored_fingerprint=current_fingerprint(), exists=True)
+    stub.responses[QUERIES["count_projected_entities"]][0]["relTypesCount"]["RATED_BY"] -= 1
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "rebuild"
+
+
+def test_fingerprint_ignores_entities_outside_projection():
+    stub = StubDriver()
+    stats = stub.responses[QUERIES["count_projected_entities"]][0]
+    stats["labels"]["GdsProjection"] = 1
+    stats["relTypesCount"]["RECOMMENDED_TO"] = 100
+    assert GraphDBDriver(driver=stub).projection_fingerprint(SELECTED_GRAPH) == current_fingerprint()
+
+
+def test_reuse_when_fingerprint_unchanged_and_projection_exists():
+    stub = StubDriver(stored_fingerprint=current_fingerprint(), exists=True)
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "reuse"
+    assert QUERIES["create_database"][SELECTED_GRAPH] not in stub.queries
+    assert QUERIES["create_node_embeddings_in_database"][SELECTED_GRAPH] not in stub.queries
+
+
+def test_skip_when_fingerprint_unchanged_and_projection_missing():
+    stub = StubDriver(stored_fingerprint=current_fingerprint(), exists=False)
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "skip"
+    assert QUERIES["estimate_database"][SELECTED_GRAPH] not in stub.queries
+    assert QUERIES["create_database"][SELECTED_GRAPH] not in stub.queries
+
+
+def test_build_when_projection_missing():
+    stub = StubDriver(stored_fingerprint=None, exists=False)
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "build"
+    assert QUERIES["delete_database"][SELECTED_GRAPH] not in stub.queries
+    assert stub.queries[-4:] == [
+        QUERIES["estimate_database"][SELECTED_GRAPH],
+        QUERIES["create_database"][SELECTED_GRAPH],
+        QUERIES["create_node_embeddings_in_database"][SELECTED_GRAPH],
+        QUERIES["set_projection_marker"],
+    ]
+
+
+def test_rebuild_drops_stale_projection_before_create():
+    stub = StubDriver(stored_fingerprint="stale", exists=True)
+    assert GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH) == "rebuild"
+    assert stub.queries[-5:] == [
+        QUERIES["estimate_database"][SELECTED_GRAPH],
+        QUERIES["delete_database"][SELECTED_GRAPH],
+        QUERIES["create_database"][SELECTED_GRAPH],
+        QUERIES["create_node_embeddings_in_database"][SELECTED_GRAPH],
+        QUERIES["set_projection_marker"],
+    ]
+
+
+def test_marker_not_written_when_fastrp_fails():
+    stub = StubDriver(failing=(QUERIES["create_node_embeddings_in_database"][SELECTED_GRAPH],))
+    with pytest.raises(RuntimeError):
+        GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH)
+    assert QUERIES["set_projection_marker"] not in stub.queries
+
+
+def test_memory_limit_exceeded(monkeypatch):
+    monkeypatch.setattr(conn, "MAX_PROJECTION_MEMORY_BYTES", 512)
+    stub = StubDriver(stored_fingerprint="stale", exists=True)
+    with pytest.raises(ProjectionMemoryLimitExceeded):
+        GraphDBDriver(driver=stub).ensure_projection(SELECTED_GRAPH)
+    assert QUERIES["delete_database"][SELECTED_GRAPH] not in stub.queries
+    assert QUERIES["create_database"][SELECTED_GRAPH] not in stub.queries
@@ -0,0 +1,60 @@
+import torch
+from torch_geometric.data import HeteroData
+
+from recommendations import distributed
+from recommendations.distributed import _pin_threads, _shard_supervision_edges
+
+
+def supervision_data(num_edges: int) -> HeteroData:
+    data = HeteroData()
+    data['user', 'rates', 'title'].edge_index = torch.arange(2 * num_edges).view(2, num_edges)
+    data['user', 'rates', 'title'].edge_label_index = torch.arange(2 * num_edges).view(2, num_edges)
+    data['user', 'rates', 'title'].edge_label = torch.arange(num_edges)
+    return data
+
+
+def test_shards_are_disjoint_and_cover_all_edges(monkeypatch):
+    monkeypatch.setattr(distributed, "WORLD_SIZE", 3)
+    data = supervision_data(num_edges=10)
+    shards = [_shard_supervision_edges(data, rank)['user', 'rates', 'title'] for rank in range(3)]
+
+    edge_label = torch.cat([shard.edge_label for shard in shards])
+    assert sorted(edge_label.tolist()) == list(range(10))
+
+    edge_label_index = torch.cat([shard.edge_label_index for shard in shards], dim=1)
+    columns = [tuple(column) for column in edge_label_index.t().tolist()]
+    assert len(columns) == len(set(columns))
+    assert set(columns) == {tuple(column) for column in data['user', 'rates', 'title'].edge_label_index.t().tolist()}
+
+    for shard in shards:
+        # Labels stay aligned with their supervision edges
+        assert torch.equal(shard.edge_label_index[0], shard.edge_label)
+
+
+def test_sharding_keeps_original_data(monkeypatch):
+    monkeypatch.setattr(distributed, "WORLD_SIZE", 4)
+    data = supervision_data(num_edges=10)
+    shard = _shard_supervision_edges(data, rank=1)
+
+    store = data['user', 'rates', 'title']
+    assert torch.equal(store.edge_label_index, torch.arange(20).view(2, 10))
+    assert torch.equal(store.edge_label, torch.arange(10))
+    # Message passing edges are shared, not sharded
+    assert shard['user', 'rates', 'title'].edge_index is store.edge_index
+
+
+def test_pinned_core_slices_do_not_overlap(monkeypatch):
+    pinned = []
+    monkeypatch.setattr(distributed, "NPROC_PER_NODE", 4)
+    monkeypatch.setattr(distributed, "THREADS_PER_PROC", None)
+    monkeypatch.setattr(distributed.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    monkeypatch.setattr(distributed.os, "sched_setaffinity", lambda pid, cores: pinned.append(set(cores)), raising=False)
+    monkeypatch.setattr(distributed.torch, "set_num_threads", lambda threads: None)
+    monkeypatch.setattr(distributed.torch, "set_num_interop_threads", lambda threads: None)
+
+    slices = [set(_pin_threads(local_rank)) for local_rank in range(4)]
+
+    assert slices == pinned
+    assert all(len(cores) == 4 for cores in slices)
+    assert set().union(*slices) == set(range(16))
+    assert sum(len(cores) for cores in slices) == 16